@@ -2,8 +2,20 @@ import arcade
 import pymunk as pm
 import math
 import random
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pymunk import Vec2d
 
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
 GRID = 24
 
 SCREEN_WIDTH = 1280
@@ -17,6 +29,18 @@ GAME_MODES = ['Gravity', 'Setup', 'Space']
 FRICTION = 0.95
 ELASTICITY = 0.4
 
+LOD_WAKE_MARGIN = SCREEN_WIDTH  # islands this close to the viewport are always simulated
+LOD_SLEEP_MARGIN = SCREEN_WIDTH * 2  # islands further than this from the viewport get frozen
+LOD_INTERVAL = 30  # ticks between passes looking for islands to freeze
+LOD_DRIFT_SPEED = GRID  # islands touching nothing and moving faster than this are left to fly off the world
+
+CHUNK_SIZE = SCREEN_WIDTH * 2
+CHUNK_LOAD_MARGIN = SCREEN_WIDTH * 3  # chunks on disk this close to the viewport get loaded back in
+CHUNK_UNLOAD_MARGIN = SCREEN_WIDTH * 4  # frozen islands further than this get written out to disk
+CHUNK_READ_RETRIES = 3  # LOD passes a chunk that fails to read is retried on before it is given up on
+
+STATS_INTERVAL = 15  # ticks between refreshes of the stats overlay
+
 COLORS = {'green': (104, 183, 35), 'red': (198, 38, 46), 'blue': (54, 137, 230), 'yellow': (249, 196, 64)}
 
 textures = [f'images/{i}.png' for i in
@@ -34,10 +58,79 @@ textures = [f'images/{i}.png' for i in
 #  -> Left clicking and dragging sometimes results in the cursor getting stuck
 
 
+def resident_memory():
+    """Returns the resident memory of the process in bytes, or None where it cannot be read."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource:
+        # only the peak is available here, in kilobytes everywhere but macOS where it is bytes
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    return None
+
+
+def chunk_batches(store, key):
+    """Lists the batch files that have been written for a chunk."""
+    if not os.path.isdir(store):
+        return []
+    prefix = f'chunk_{key[0]}_{key[1]}_'
+    return [os.path.join(store, name) for name in os.listdir(store)
+            if name.startswith(prefix) and name.endswith('.pickle')]
+
+
+def write_chunk(path, data):
+    """Writes a batch of pickled groups to its own chunk file, runs on the chunk worker thread.
+
+    The batch is written under a temporary name and only then renamed into place, so a write that fails partway
+    never leaves a truncated file for a read to trip over.
+    """
+    start = time.perf_counter()
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return [], len(data), time.perf_counter() - start, []
+
+
+def read_chunk(store, key):
+    """Reads back every batch file of a chunk, runs on the chunk worker thread.
+
+    Batches that unpickle are removed and their groups returned, any that fail are left in place and their errors
+    returned alongside.
+    """
+    groups = []
+    errors = []
+    size = 0
+    io_time = 0.0
+    for path in chunk_batches(store, key):
+        try:
+            start = time.perf_counter()
+            with open(path, 'rb') as f:
+                data = f.read()
+            io_time += time.perf_counter() - start
+            batch = pickle.loads(data)
+            os.remove(path)
+        except Exception as error:
+            errors.append(error)
+            continue
+        groups.extend(batch)
+        size += len(data)
+    return groups, size, io_time, errors
+
+
 class PhysicsSprite(arcade.Sprite):
     def __init__(self, pm_shape, filename):
         super().__init__(filename, center_x=pm_shape.body.position.x, center_y=pm_shape.body.position.y)
         self.pm_shape = pm_shape
+        self.filename = filename
 
     def __repr__(self):
         return f'{self.pm_shape} {self.pm_shape.body}'
@@ -194,6 +287,20 @@ class Careenium(arcade.Window):
 
         self.camera_offset = Vec2d(0, 0)
 
+        self.frozen_islands = []
+        self.frozen_bodies = set()
+        self.lod_tick = 0
+
+        self.stored_chunks = {}
+        self.chunk_jobs = []
+        self.failed_chunks = {}
+        self.chunk_retries = {}
+        self.resident_bodies = set()
+        self.chunk_batch = 0
+        self.chunk_stats = {'bytes_read': 0, 'bytes_written': 0, 'io_time': 0.0, 'load_latency': 0.0, 'failures': 0}
+        self.chunk_executor = ThreadPoolExecutor(max_workers=1)  # one worker, so a chunk is never read before it is written
+        self.chunk_store = tempfile.mkdtemp(prefix='careenium-')
+
         self.mouse_down = False
         self.mouse_button = None
         self.mouse_pos = Vec2d(0, 0)
@@ -203,6 +310,7 @@ class Careenium(arcade.Window):
         self.straight_lines = False
         self.snap_to_center = False
         self.debug = True
+        self.show_stats = False
         self.shape_dynamic = True
 
         self.tick = 0
@@ -226,6 +334,9 @@ class Careenium(arcade.Window):
         self.highlight_box = arcade.Sprite('images/highlight_box.png')
         self.highlight_box.alpha = 150
 
+        # draw_text renders a texture per distinct string, so the overlay text is only rebuilt now and again
+        self.stats_string = ''
+
         self.object_mode_button = Button(position=Vec2d(GRID * 3, GRID), value=0,
                                          list_of_vals=OBJECT_MODES)
         self.game_mode_button = Button(position=Vec2d(GRID * 8, GRID), value=0,
@@ -286,6 +397,10 @@ class Careenium(arcade.Window):
 
     def delete_object(self, obj):
         """Deletes a given object from the world, as well as from anywhere it may be referenced."""
+        for island in self.frozen_islands[:]:
+            if obj.pm_shape.body in island['anchors']:
+                self.thaw_island(island)
+        self.resident_bodies.discard(obj.pm_shape.body)
         for _ in range(len(obj.pm_shape.body.constraints)):
             for joint in self.joints:
                 if obj.pm_shape.body in [joint[0].a, joint[0].b]:
@@ -303,6 +418,370 @@ class Careenium(arcade.Window):
         self.space.remove(obj.pm_shape, obj.pm_shape.body)
         obj.remove_from_sprite_lists()
 
+    @staticmethod
+    def out_of_bounds(position):
+        return not (-SCREEN_WIDTH * 9 < position.x < SCREEN_WIDTH * 10) or not (
+                -SCREEN_HEIGHT * 9 < position.y < SCREEN_HEIGHT * 10)
+
+    def view_bounds(self, margin):
+        """Returns the (left, bottom, right, top) of the viewport grown by margin on every side."""
+        return (self.camera_offset.x - margin, self.camera_offset.y - margin,
+                self.camera_offset.x + SCREEN_WIDTH + margin, self.camera_offset.y + SCREEN_HEIGHT + margin)
+
+    @staticmethod
+    def bounds_overlap(a, b):
+        return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+    def get_island(self, body, live_constraints):
+        """Collects every dynamic body, shape and joint connected to body through constraints or contacts.
+
+        Like pymunk's own islands, the walk stops at kinematic and static bodies. They are kept as anchors
+        and never leave the space, so whatever rests on them without a joint keeps something to rest on.
+        """
+        bodies = {body}
+        anchors = set()
+        constraints = set()
+        to_visit = [body]
+        touching = []
+
+        def visit(other):
+            # motors and the mouse hang off bodies that were never added to the space
+            if other in bodies or other.space is not self.space:
+                return
+            if other.body_type == pm.Body.DYNAMIC:
+                bodies.add(other)
+                to_visit.append(other)
+            else:
+                anchors.add(other)
+
+        def visit_contact(arbiter):
+            touching.append(arbiter)
+            for shape in arbiter.shapes:
+                visit(shape.body)
+
+        while to_visit:
+            cur_body = to_visit.pop()
+            for joint in cur_body.constraints:
+                if joint in constraints or joint not in live_constraints:
+                    continue
+                constraints.add(joint)
+                visit(joint.a)
+                visit(joint.b)
+            # bodies only stacked on each other are frozen together too, so a stack is never split
+            cur_body.each_arbiter(visit_contact)
+        shapes = [shape for b in bodies for shape in b.shapes]
+        xs = [shape.bb.left for shape in shapes] + [shape.bb.right for shape in shapes] + [b.position.x for b in bodies]
+        ys = [shape.bb.bottom for shape in shapes] + [shape.bb.top for shape in shapes] + [b.position.y for b in bodies]
+        return {'bodies': bodies, 'anchors': anchors, 'shapes': shapes, 'constraints': constraints,
+                'bounds': (min(xs), min(ys), max(xs), max(ys)), 'touching': bool(touching)}
+
+    def touches_live_body(self, island):
+        """Whether a live dynamic shape has come inside the bounds of a frozen island."""
+        left, bottom, right, top = island['bounds']
+        return any(shape.body.body_type == pm.Body.DYNAMIC
+                   for shape in self.space.bb_query(pm.BB(left, bottom, right, top), pm.ShapeFilter()))
+
+    def freeze_island(self, island):
+        """Takes an island out of the space, its bodies keep their position and velocity while frozen."""
+        self.space.remove(*island['constraints'], *island['shapes'], *island['bodies'])
+        self.frozen_bodies |= island['bodies']
+        self.frozen_islands.append(island)
+
+    def drifting(self, island):
+        """Whether an island touches nothing and is still moving, most likely on its way off the world."""
+        return not island['touching'] and not island['anchors'] and any(
+            body.velocity.length > LOD_DRIFT_SPEED for body in island['bodies'])
+
+    def thaw_island(self, island):
+        """Puts a frozen island back into the space exactly as it was left."""
+        self.space.add(*island['bodies'], *island['shapes'], *island['constraints'])
+        self.frozen_bodies -= island['bodies']
+        self.frozen_islands.remove(island)
+
+    def update_lod(self):
+        """Freezes islands of connected bodies far from the camera and thaws them as the camera comes near.
+
+        Frozen shapes are not in the space, so an island is also thawed the moment a live body reaches it,
+        before the two can pass through or overlap each other.
+        """
+        wake_bounds = self.view_bounds(LOD_WAKE_MARGIN)
+        for island in self.frozen_islands[:]:
+            if self.bounds_overlap(island['bounds'], wake_bounds) or self.touches_live_body(island):
+                self.thaw_island(island)
+
+        self.lod_tick += 1
+        if self.lod_tick % LOD_INTERVAL:
+            return
+        sleep_bounds = self.view_bounds(LOD_SLEEP_MARGIN)
+        pinned = {sprite.pm_shape.body for sprite in (self.cur_shape, self.last_shape, self.follow_shape) if sprite}
+        live_constraints = set(self.space.constraints)
+        visited = set()
+        for body in self.space.bodies:
+            # islands without a dynamic body cost next to nothing to step, and double as ground
+            if body in visited or body.body_type != pm.Body.DYNAMIC:
+                continue
+            island = self.get_island(body, live_constraints)
+            visited |= island['bodies']
+            if (island['bodies'] | island['anchors']) & pinned or self.bounds_overlap(island['bounds'], sleep_bounds):
+                continue
+            # left live, so the out of bounds check in on_update still gets to delete them. frozen bodies do
+            # not move, so nothing frozen here can end up out of bounds later on
+            if self.drifting(island) or any(self.out_of_bounds(b.position) for b in island['bodies']):
+                continue
+            self.freeze_island(island)
+
+    def chunk_path(self, key, batch):
+        return os.path.join(self.chunk_store, f'chunk_{key[0]}_{key[1]}_{batch}.pickle')
+
+    def pack_sprite(self, sprite, background):
+        """Takes a sprite out of the world and returns what is needed to rebuild it."""
+        packed = {'shape': sprite.pm_shape, 'filename': sprite.filename, 'width': sprite.width,
+                  'height': sprite.height, 'center_x': sprite.center_x, 'center_y': sprite.center_y,
+                  'angle': sprite.angle, 'background': background, 'static': sprite in self.static_shapes,
+                  'pipe': (sprite.pipe_shape, sprite.pipe_velocity) if sprite in self.pipes else None}
+        if packed['static']:
+            self.static_shapes.remove(sprite)
+        if packed['pipe']:
+            self.pipes.remove(sprite)
+        sprite.remove_from_sprite_lists()
+        return packed
+
+    def unpack_sprite(self, packed):
+        sprite = PhysicsSprite(packed['shape'], packed['filename'])
+        sprite.width = packed['width']
+        sprite.height = packed['height']
+        # joint sprites sit on an unused body at the origin, so their placement has to be restored as well
+        sprite.center_x = packed['center_x']
+        sprite.center_y = packed['center_y']
+        sprite.angle = packed['angle']
+        if packed['background']:
+            self.background_sprite_list.append(sprite)
+        else:
+            self.sprite_list.append(sprite)
+        if packed['static']:
+            self.static_shapes.append(sprite)
+        if packed['pipe']:
+            sprite.pipe_shape, sprite.pipe_velocity = packed['pipe']
+            self.pipes.append(sprite)
+        return sprite
+
+    def pack_island(self, island, sprites):
+        """Bundles a frozen island up with its sprites and joint sprites, ready to be pickled."""
+        packed_sprites = [self.pack_sprite(*sprites[shape]) for shape in island['shapes'] if shape in sprites]
+        packed_joints = []
+        for joint in self.joints[:]:
+            if joint[0] in island['constraints']:
+                packed_joints.append((joint[0], [self.pack_sprite(sprite, True) for sprite in joint[1:]]))
+                self.joints.remove(joint)
+        self.frozen_islands.remove(island)
+        self.frozen_bodies -= island['bodies']
+        return {'bodies': list(island['bodies']), 'anchors': list(island['anchors']), 'shapes': island['shapes'],
+                'constraints': list(island['constraints']), 'bounds': island['bounds'], 'touching': island['touching'],
+                'sprites': packed_sprites, 'joints': packed_joints}
+
+    def unpack_island(self, packed):
+        """Rebuilds an island read from disk, it stays frozen until the camera is close enough to thaw it."""
+        for packed_sprite in packed['sprites']:
+            self.unpack_sprite(packed_sprite)
+        for joint, packed_sprites in packed['joints']:
+            self.joints.append((joint, *[self.unpack_sprite(packed_sprite) for packed_sprite in packed_sprites]))
+        island = {'bodies': set(packed['bodies']), 'anchors': set(packed['anchors']), 'shapes': packed['shapes'],
+                  'constraints': set(packed['constraints']), 'bounds': packed['bounds'],
+                  'touching': packed['touching']}
+        self.frozen_islands.append(island)
+        self.frozen_bodies |= island['bodies']
+        return island
+
+    @staticmethod
+    def anchor_bounds(anchors):
+        bbs = [shape.bb for anchor in anchors for shape in anchor.shapes]
+        xs = [bb.left for bb in bbs] + [bb.right for bb in bbs] + [anchor.position.x for anchor in anchors]
+        ys = [bb.bottom for bb in bbs] + [bb.top for bb in bbs] + [anchor.position.y for anchor in anchors]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def get_far_groups(self, unload_bounds):
+        """Joins frozen islands through the anchors they share, and returns the groups that can leave memory.
+
+        A group can go once all of its islands are frozen, and all of it is far away, and nothing live rests on or
+        is jointed to its anchors. Anchors with no frozen island on them, like bare ground lines, are groups of
+        their own.
+        """
+        pinned = {sprite.pm_shape.body for sprite in (self.cur_shape, self.last_shape, self.follow_shape) if sprite}
+        live_constraints = set(self.space.constraints)
+        anchor_islands = {}
+        for island in self.frozen_islands:
+            for anchor in island['anchors']:
+                anchor_islands.setdefault(anchor, []).append(island)
+        lone_islands = [island for island in self.frozen_islands if not island['anchors']]
+        anchors = [body for body in self.space.bodies if body.body_type != pm.Body.DYNAMIC]
+
+        groups = [([island], set()) for island in lone_islands]
+        visited = set()
+        for anchor in anchors:
+            if anchor in visited:
+                continue
+            group_islands = {}
+            group_anchors = {anchor}
+            to_visit = [anchor]
+            while to_visit:
+                for island in anchor_islands.get(to_visit.pop(), []):
+                    if id(island) in group_islands:
+                        continue
+                    group_islands[id(island)] = island
+                    for other in island['anchors'] - group_anchors:
+                        group_anchors.add(other)
+                        to_visit.append(other)
+            visited |= group_anchors
+            groups.append((list(group_islands.values()), group_anchors))
+
+        far_groups = []
+        for islands, group_anchors in groups:
+            if any(island['bodies'] & self.resident_bodies or self.bounds_overlap(island['bounds'], unload_bounds)
+                   for island in islands):
+                continue
+            if group_anchors & (pinned | self.resident_bodies):
+                continue
+            touching = []
+            for anchor in group_anchors:
+                anchor.each_arbiter(touching.append)
+            if touching or any(joint in live_constraints for anchor in group_anchors for joint in anchor.constraints):
+                continue
+            if group_anchors and self.bounds_overlap(self.anchor_bounds(group_anchors), unload_bounds):
+                continue
+            far_groups.append((islands, group_anchors))
+        return far_groups
+
+    def pack_group(self, group, sprites):
+        """Takes a group's anchors out of the space and bundles them up with its islands, ready to be pickled."""
+        islands, anchors = group
+        anchor_shapes = [shape for anchor in anchors for shape in anchor.shapes]
+        self.space.remove(*anchor_shapes, *anchors)
+        return {'islands': [self.pack_island(island, sprites) for island in islands], 'anchors': list(anchors),
+                'anchor_shapes': anchor_shapes,
+                'anchor_sprites': [self.pack_sprite(*sprites[shape]) for shape in anchor_shapes if shape in sprites]}
+
+    def unpack_group(self, packed):
+        """Puts a group's anchors straight back into the space, its islands stay frozen until the camera nears."""
+        self.space.add(*packed['anchors'], *packed['anchor_shapes'])
+        for packed_sprite in packed['anchor_sprites']:
+            self.unpack_sprite(packed_sprite)
+        return [self.unpack_island(packed_island) for packed_island in packed['islands']]
+
+    def store_groups(self, groups):
+        """Writes groups out to the chunk their center falls in.
+
+        Groups are stored whole, so joints crossing a chunk border are saved and loaded with both of their bodies,
+        and a ground line is saved with whatever rests on it. The chunk remembers the bounds of everything stored in
+        it, and is loaded back when any of that comes near.
+        """
+        sprites = {sprite.pm_shape: (sprite, False) for sprite in self.sprite_list}
+        sprites.update({sprite.pm_shape: (sprite, True) for sprite in self.background_sprite_list})
+        chunks = {}
+        for islands, anchors in groups:
+            corners = [island['bounds'] for island in islands]
+            if anchors:
+                corners.append(self.anchor_bounds(anchors))
+            bounds = (min(b[0] for b in corners), min(b[1] for b in corners),
+                      max(b[2] for b in corners), max(b[3] for b in corners))
+            key = (int((bounds[0] + bounds[2]) / 2 // CHUNK_SIZE), int((bounds[1] + bounds[3]) / 2 // CHUNK_SIZE))
+            chunks.setdefault(key, []).append(self.pack_group((islands, anchors), sprites))
+            self.add_chunk_bounds(key, bounds)
+        for key, packed in chunks.items():
+            self.chunk_batch += 1
+            future = self.chunk_executor.submit(write_chunk, self.chunk_path(key, self.chunk_batch),
+                                                pickle.dumps(packed))
+            self.chunk_jobs.append(('write', key, packed, time.perf_counter(), future))
+
+    def add_chunk_bounds(self, key, bounds):
+        stored = self.stored_chunks.get(key, bounds)
+        self.stored_chunks[key] = (min(stored[0], bounds[0]), min(stored[1], bounds[1]),
+                                   max(stored[2], bounds[2]), max(stored[3], bounds[3]))
+
+    def chunk_failed(self, kind, key, data, error):
+        """Recovers from a chunk read or write that raised on the worker thread.
+
+        A failed write puts its groups back into memory for good. The batches of a failed read that could not be
+        loaded are retried on the next few LOD passes, then left on disk and given up on.
+        """
+        print(f'Chunk {kind} failed for {key}: {error!r}')
+        self.chunk_stats['failures'] += 1
+        exists = bool(chunk_batches(self.chunk_store, key))
+        if kind == 'write':
+            for packed in data:
+                self.unpack_group(packed)
+                self.resident_bodies.update(packed['anchors'])
+                for packed_island in packed['islands']:
+                    self.resident_bodies.update(packed_island['bodies'])
+            if not exists:
+                self.stored_chunks.pop(key, None)
+            return
+        retries = self.chunk_retries.pop(key, 0) + 1
+        if not exists:
+            return
+        if retries < CHUNK_READ_RETRIES:
+            self.chunk_retries[key] = retries
+            self.failed_chunks[key] = data
+        else:
+            print(f'Giving up on chunk {key} after {retries} failed reads')
+
+    def update_chunks(self):
+        """Streams far off frozen islands out to disk, and loads them back as the camera nears.
+
+        Islands go out together with the anchors they rest on or are jointed to, see get_far_groups.
+        """
+        load_bounds = self.view_bounds(CHUNK_LOAD_MARGIN)
+        for key, bounds in list(self.stored_chunks.items()):
+            if self.bounds_overlap(bounds, load_bounds):
+                del self.stored_chunks[key]
+                future = self.chunk_executor.submit(read_chunk, self.chunk_store, key)
+                self.chunk_jobs.append(('read', key, bounds, time.perf_counter(), future))
+
+        for job in self.chunk_jobs[:]:
+            kind, key, data, started, future = job
+            if not future.done():
+                continue
+            self.chunk_jobs.remove(job)
+            try:
+                groups, size, io_time, errors = future.result()
+            except Exception as error:
+                self.chunk_failed(kind, key, data, error)
+                continue
+            self.chunk_stats['io_time'] += io_time
+            if kind == 'read':
+                for packed in groups:
+                    self.unpack_group(packed)
+                self.chunk_stats['bytes_read'] += size
+                self.chunk_stats['load_latency'] = time.perf_counter() - started
+                if errors:
+                    self.chunk_failed(kind, key, data, errors[0])
+                else:
+                    self.chunk_retries.pop(key, None)
+            else:
+                self.chunk_stats['bytes_written'] += size
+
+        if self.lod_tick % LOD_INTERVAL:
+            return
+        for key, bounds in self.failed_chunks.items():
+            self.add_chunk_bounds(key, bounds)
+        self.failed_chunks.clear()
+        far_groups = self.get_far_groups(self.view_bounds(CHUNK_UNLOAD_MARGIN))
+        if far_groups:
+            self.store_groups(far_groups)
+
+    def update_stats(self):
+        stats = self.chunk_stats
+        throughput = 0
+        if stats['io_time']:
+            throughput = (stats['bytes_read'] + stats['bytes_written']) / stats['io_time'] / 1024 ** 2
+        memory = resident_memory()
+        self.stats_string = (f"Memory: {f'{memory / 1024 ** 2:.1f} MB' if memory else 'n/a'} | "
+                             f"Bodies: {len(self.space.bodies)} live, {len(self.frozen_bodies)} frozen | "
+                             f"Sprites: {len(self.sprite_list) + len(self.background_sprite_list)} | "
+                             f"Chunks: {len(self.stored_chunks)} on disk "
+                             f"({(stats['bytes_written'] - stats['bytes_read']) / 1024:.1f} KB), "
+                             f"{len(self.chunk_jobs)} in flight, {stats['failures']} failed | "
+                             f"Load: {stats['load_latency'] * 1000:.1f} ms | I/O: {throughput:.1f} MB/s")
+
     def clear_variables(self):
         if self.shape_being_dragged and self.cur_shape.pm_shape.body.body_type == 0:
             self.space.remove(
@@ -357,6 +836,11 @@ class Careenium(arcade.Window):
 
         self.pointer.draw()
 
+        if self.show_stats:
+            arcade.draw_text(text=self.stats_string,
+                             start_x=self.camera_offset.x + GRID, start_y=self.camera_offset.y + SCREEN_HEIGHT - GRID,
+                             color=arcade.color.WHITE, font_size=12)
+
     def make_plank(self, start, end, vel=(0, 0), friction=FRICTION, elasticity=ELASTICITY, mass=12.0,
                    image='images/plank.png'):
         start = Vec2d(start)
@@ -607,7 +1091,15 @@ class Careenium(arcade.Window):
         self.pointer.position = self.mouse_pos
         self.mouse_body.position = self.mouse_pos
 
+    def on_close(self):
+        self.chunk_executor.shutdown()
+        shutil.rmtree(self.chunk_store, ignore_errors=True)
+        super().on_close()
+
     def on_key_press(self, symbol: int, modifiers: int):
+        if symbol == arcade.key.F3:
+            self.show_stats = not self.show_stats
+            self.update_stats()
         if symbol == arcade.key.LSHIFT or arcade.key.RSHIFT:
             self.straight_lines = True
 
@@ -620,6 +1112,8 @@ class Careenium(arcade.Window):
             self.tick += 1
             if self.tick % 60 == 0:
                 for pipe in self.pipes:
+                    if pipe.pm_shape.body in self.frozen_bodies:
+                        continue
                     pipe.pm_shape.body.velocity -= pipe.pipe_velocity
                     self.make_shape(pipe.pm_shape.body.position, pipe.pipe_velocity, pipe.pipe_shape)
                     print('cool')
@@ -633,19 +1127,25 @@ class Careenium(arcade.Window):
             self.set_viewport(self.camera_offset.x, self.camera_offset.x + SCREEN_WIDTH, self.camera_offset.y,
                               self.camera_offset.y + SCREEN_HEIGHT)
 
+        self.update_lod()
+        self.update_chunks()
+        if self.show_stats and self.lod_tick % STATS_INTERVAL == 0:
+            self.update_stats()
+
         self.space.step(
             1 / 240.0)  # some code needs to be rewritten so this doesnt allow "static" objects to fall a lil
         self.space.step(1 / 240.0)
         self.space.step(1 / 240.0)
 
         for sprite in self.sprite_list:
+            if sprite.pm_shape.body in self.frozen_bodies:
+                continue
             sprite.center_x = sprite.pm_shape.body.position.x
             sprite.center_y = sprite.pm_shape.body.position.y
             sprite.angle = math.degrees(sprite.pm_shape.body.angle)
             if sprite == self.cur_shape:
                 self.highlight_shape(self.cur_shape)
-            if not (-SCREEN_WIDTH * 9 < sprite.pm_shape.body.position.y < SCREEN_WIDTH * 10) or not (
-                    -SCREEN_HEIGHT * 9 < sprite.pm_shape.body.position.y < SCREEN_HEIGHT * 10):
+            if self.out_of_bounds(sprite.pm_shape.body.position):
                 cur_shape = self.get_shape(sprite.pm_shape.body.position)
                 if cur_shape:
                     self.delete_object(cur_shape)
@@ -654,16 +1154,19 @@ class Careenium(arcade.Window):
                 sprite.pm_shape.body.angular_velocity = 0
 
         for sprite in self.background_sprite_list:
+            if sprite.pm_shape.body in self.frozen_bodies:
+                continue
             sprite.center_x = sprite.pm_shape.body.position.x
             sprite.center_y = sprite.pm_shape.body.position.y
             sprite.angle = math.degrees(sprite.pm_shape.body.angle)
-            if not (-SCREEN_WIDTH * 9 < sprite.pm_shape.body.position.y < SCREEN_WIDTH * 10) or not (
-                    -SCREEN_HEIGHT * 9 < sprite.pm_shape.body.position.y < SCREEN_HEIGHT * 10):
+            if self.out_of_bounds(sprite.pm_shape.body.position):
                 cur_shape = self.get_shape(sprite.pm_shape.body.position)
                 if cur_shape:
                     self.delete_object(cur_shape)
 
         for joint in self.joints:
+            if joint[0].a in self.frozen_bodies:
+                continue
             if type(joint[0]) is pm.constraint.PinJoint:
                 start = joint[0].a.local_to_world(joint[0].anchor_a)
                 end = joint[0].b.local_to_world(joint[0].anchor_b)